@@ -0,0 +1,40 @@
+# cython: language_level=3
+###############################################################################
+# (c) Copyright 2022 CERN for the benefit of the LHCb Collaboration           #
+#                                                                             #
+# This software is distributed under the terms of the GNU General Public      #
+# Licence version 3 (GPL Version 3), copied verbatim in the file "COPYING".   #
+#                                                                             #
+# In applying this licence, CERN does not waive the privileges and immunities #
+# granted to it by virtue of its status as an Intergovernmental Organization  #
+# or submit itself to any jurisdiction.                                       #
+###############################################################################
+
+'''
+optional compiled helpers for event_file_checker
+
+They only say whether the data is valid, the pure python checks being
+rerun in case it's not in order to build a precise error message
+'''
+
+from cpython.float cimport PyFloat_Check
+from cpython.long cimport PyLong_Check
+from cpython.list cimport PyList_Check
+
+cpdef bint all_floats(object data):
+    '''Returns whether all items of the list data are floats or ints'''
+    cdef object item
+    for item in data:
+        if not PyFloat_Check(item) and not PyLong_Check(item):
+            return False
+    return True
+
+cpdef bint all_triplets(object data):
+    '''Returns whether all items of the list data are lists of 3 floats or ints'''
+    cdef object position
+    for position in data:
+        if not PyList_Check(position) or len(position) != 3:
+            return False
+        if not all_floats(position):
+            return False
+    return True
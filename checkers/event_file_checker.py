@@ -8,46 +8,90 @@
 # granted to it by virtue of its status as an Intergovernmental Organization  #
 # or submit itself to any jurisdiction.                                       #
 ###############################################################################
+import functools
+import os
 import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+try:
+    import numpy
+except ImportError:
+    numpy = None
+try:
+    # compiled helpers, see _fastcheck.pyx
+    import _fastcheck
+except ImportError:
+    _fastcheck = None
 
 '''checker for syntax of Phoenix event file format'''
 
 class PhoenixFormatError(Exception):
-    '''Main exception thrown in case of bad format'''
-    def __init__(self, msg):
-        self.message = msg
+    '''
+    Main exception thrown in case of bad format
+
+    The message is given as a format string followed by its arguments, so that
+    it is only formatted when actually needed, e.g. when printed. Thus args
+    holds this format string and its arguments, the message being given by
+    str() or the message property
+    '''
+    @property
+    def message(self):
+        msg, *args = self.args
+        return msg % tuple(args) if args else msg
+
+    def __str__(self):
+        return self.message
+
+class _LazyName:
+    '''
+    name of an object for error messages, made of several parts only
+    concatenated when converted to a string, that is when an error is raised
+    '''
+    __slots__ = ('parts',)
+
+    def __init__(self, *parts):
+        self.parts = parts
+
+    def __str__(self):
+        return ''.join(map(str, self.parts))
 
-def genericCheck(j, d, objName, objType):
+'''marker for missing entries, so that a single dict lookup is needed per key'''
+_MISSING = object()
+
+def genericCheck(j, required, optional, objName, objType):
     '''
     generic checker of the structure of a json object j
 
-    d is a dictionnary describing what to check.
-    Each entry is a potential key of the j object associated to
-    a pair of values : (isOpt, checker)
-    where isOpt is a boolean saying whether this entry is optional
-    or not and checker is a function which will be called to check
-    the syntax of the entry's value
+    required and optional are tuples describing what to check.
+    Each of their items is a pair of values : (key, checker)
+    where key is a potential key of the j object, mandatory if it comes
+    from required and optional otherwise, and checker is a function
+    which will be called to check the syntax of the entry's value
 
     objName and objType are strings describing object j for logging
     '''
     # j should be an object
-    if not isinstance(j, dict):
+    if type(j) is not dict and not isinstance(j, dict):
         raise PhoenixFormatError(
-            "Expected %s to be dictionaries. Not the case for %s" % (objType, objName))
-    # go through the entries to check
-    for key in d:
-        isOpt, checker = d[key]
-        # check presence of mandatory entries
-        if not isOpt and not key in j:
-            raise PhoenixFormatError("Expected a '%s' attribute in %s" % (key, objName))
-        if key in j:
-            checker(j[key], objName + ", attribute '" + key + "'")
+            "Expected %s to be dictionaries. Not the case for %s", objType, objName)
+    # check presence and syntax of mandatory entries
+    for key, checker in required:
+        v = j.get(key, _MISSING)
+        if v is _MISSING:
+            raise PhoenixFormatError("Expected a '%s' attribute in %s", key, objName)
+        checker(v, _LazyName(objName, ", attribute '", key, "'"))
+    # check syntax of optional entries which are present
+    for key, checker in optional:
+        v = j.get(key, _MISSING)
+        if v is not _MISSING:
+            checker(v, _LazyName(objName, ", attribute '", key, "'"))
 
 def genericTypeCheck(j, objName, typ):
     '''Checks that the object has the given type'''
-    if not isinstance(j, typ):
+    # exact type comparison is the fast path, isinstance allows subclasses
+    if type(j) is not typ and not isinstance(j, typ):
         raise PhoenixFormatError(
-            'Expected the %s to be of type "%s", found %s' % (objName, typ.__name__, type(j).__name__))
+            'Expected the %s to be of type "%s", found %s', objName, typ.__name__, type(j).__name__)
 
 def noCheck(j, name):
     ''' no checking anything !'''
@@ -55,13 +99,20 @@ def noCheck(j, name):
     
 def floatCheck(j, name):
     '''Checks that the object is a float'''
-    if not isinstance(j, float) and not isinstance(j, int):
+    t = type(j)
+    # isinstance is still needed for subclasses of int, e.g. booleans
+    if t is not float and t is not int and not isinstance(j, (float, int)):
         raise PhoenixFormatError(
-            'Expected the %s to be of type float or int, found %s' % (name, type(j).__name__))
+            'Expected the %s to be of type float or int, found %s', name, type(j).__name__)
 
 def colorAttributeCheck(j, name):
     '''Checks that the object is a color. Actually only checking it's a string for the moment'''
-    genericTypeCheck(j, name, str)
+    # same as genericTypeCheck(j, name, str), inlined as colors are everywhere
+    if type(j) is not str and not isinstance(j, str):
+        raise PhoenixFormatError('Expected the %s to be of type "str", found %s', name, type(j).__name__)
+
+'''the optional color entry, shared by the description of most objects'''
+_COLOR_OPT = ('color', colorAttributeCheck)
 
 def dparamsAttributeCheck(j, name):
     '''Checks that the object is dparams.'''
@@ -70,8 +121,51 @@ def dparamsAttributeCheck(j, name):
     # check number of entries is a multiple of 3
     if len(j) != 5:
         raise PhoenixFormatError(
-            "Expected the 'dparams' attribute to contain d0,z0,phi0,qOverP. Not the case for %s (found %d elements)"
-            % (name, len(j)))
+            "Expected the 'dparams' attribute to contain d0,z0,phi0,qOverP. Not the case for %s (found %d elements)",
+            name, len(j))
+
+# below this size, numpy's conversion costs more than checking items one by one
+_NUMPY_MIN_ITEMS = 500
+
+def _numericArray(j):
+    '''
+    Converts list j into a numpy array in a single pass, if it only contains floats or ints.
+    Returns None when this could not be done (numpy not available, small list,
+    nested lists or some item not a number), in which case items have to be checked one by one
+    '''
+    if numpy is None or len(j) < _NUMPY_MIN_ITEMS:
+        return None
+    try:
+        # no dtype given on purpose : forcing float64 would silently convert strings and None
+        arr = numpy.asarray(j)
+    except (ValueError, TypeError):
+        return None
+    # booleans are accepted, as they are ints for isinstance
+    return arr if arr.dtype.kind in 'biuf' else None
+
+def _allFloats(j):
+    '''
+    Fast check that all items of list j are floats or ints, using the compiled helpers if available,
+    numpy otherwise. See _numericArray for when the later returns False
+    '''
+    if _fastcheck is not None:
+        return _fastcheck.all_floats(j)
+    arr = _numericArray(j)
+    return arr is not None and arr.ndim == 1
+
+'''
+minimum size of lists worth checking with _allFloats : any size with the compiled helpers,
+_NUMPY_MIN_ITEMS with numpy, and never without any of them
+'''
+_FAST_MIN_ITEMS = 0 if _fastcheck is not None else _NUMPY_MIN_ITEMS if numpy is not None else sys.maxsize
+
+def _allTriplets(j):
+    '''
+    Same as _allFloats, checking that all items of list j are lists of 3 floats or ints.
+    Only uses the compiled helpers, as converting nested lists with numpy is slower
+    than checking them one by one
+    '''
+    return _fastcheck is not None and _fastcheck.all_triplets(j)
 
 def floatListCheck(j, name, nitems=-1):
     '''Checks that the object is a float list and that the number of items is the number expected if nitems >= 0'''
@@ -79,18 +173,24 @@ def floatListCheck(j, name, nitems=-1):
     genericTypeCheck(j, name, list)
     # check number of items if needed
     if nitems >= 0 and len(j) != nitems:
-        raise PhoenixFormatError("Expected %d entries in %s, got %d" % (nitems, name, len(j)))
-    # check all items are floats
-    n = 0
-    for item in j:
-        floatCheck(item, name + ", item %d" % n)
-        n += 1
+        raise PhoenixFormatError("Expected %d entries in %s, got %d", nitems, name, len(j))
+    # check all items are floats, in one go if possible
+    if len(j) >= _FAST_MIN_ITEMS and _allFloats(j):
+        return
+    for n, item in enumerate(j):
+        # only name the item when it is wrong
+        if type(item) is not float and type(item) is not int:
+            floatCheck(item, _LazyName(name, ", item ", n))
+
+'''valid types of Hit objects'''
+_HIT_TYPES = frozenset(('Point', 'Box', 'Line'))
 
 def hitTypeCheck(j, name):
     '''check that the object is a valid hit Type, so one of Point, Line or Box'''
-    if j not in ('Point', 'Box', 'Line'):
+    # checking type first as non strings may not be hashable
+    if not isinstance(j, str) or j not in _HIT_TYPES:
         raise PhoenixFormatError(
-            'Invalid hit type "%s" in %s. Valid values are Point, Line and Box' % (j, name))    
+            'Invalid hit type "%s" in %s. Valid values are Point, Line and Box', j, name)
     
 def posAttributeCheck(position, objName):
     '''Check that the object is a valid pos attibute, so a list of floats with number of items being a multiple of 3'''
@@ -99,45 +199,125 @@ def posAttributeCheck(position, objName):
     # check number of entries is a multiple of 3
     if len(position) % 3 != 0:
         raise PhoenixFormatError(
-            "Expected the 'pos' attribute to contain triplets of coordinates. Not the case for %s (found %d elements)"
-            % (objName, len(position)))
-        
+            "Expected the 'pos' attribute to contain triplets of coordinates. Not the case for %s (found %d elements)",
+            objName, len(position))
+
+'''
+fast tests inlined by _compile for the most common checkers, the checker
+itself being only called when they fail, to confirm and build the error
+'''
+_INLINED_TESTS = {
+    floatCheck: 'type(v) is not float and type(v) is not int',
+    colorAttributeCheck: 'type(v) is not str',
+}
+
+def _compile(required, optional, objType):
+    '''
+    generates a checker function specialized for objects described by required and optional
+
+    required and optional have the same format as for genericCheck and the returned
+    function, taking the object and its name as arguments, is equivalent to
+    genericCheck(j, required, optional, objName, objType). However, the loops on entries
+    are unrolled into straight line code and the most common checks are inlined,
+    see _INLINED_TESTS
+    '''
+    namespace = {'PhoenixFormatError': PhoenixFormatError, '_MISSING': _MISSING, '_LazyName': _LazyName}
+    lines = [
+        'def check(j, objName):',
+        '    if type(j) is not dict and not isinstance(j, dict):',
+        '        raise PhoenixFormatError(%r, objName)'
+        % ('Expected %s to be dictionaries. Not the case for %%s' % objType),
+    ]
+    entries = [(key, checker, False) for key, checker in required] + \
+              [(key, checker, True) for key, checker in optional]
+    for n, (key, checker, isOpt) in enumerate(entries):
+        checkerName = '_checker%d' % n
+        namespace[checkerName] = checker
+        call = '%s(v, _LazyName(objName, %r))' % (checkerName, ", attribute '" + key + "'")
+        if checker in _INLINED_TESTS:
+            call = 'if %s: %s' % (_INLINED_TESTS[checker], call)
+        lines.append('    v = j.get(%r, _MISSING)' % key)
+        if isOpt:
+            lines.append('    if v is not _MISSING:')
+            lines.append('        ' + call)
+        else:
+            lines.append('    if v is _MISSING:')
+            lines.append('        raise PhoenixFormatError(%r, objName)'
+                         % ("Expected a '%s' attribute in %%s" % key))
+            lines.append('    ' + call)
+    exec('\n'.join(lines), namespace)
+    return namespace['check']
+
+def _bulkFloatEntriesCheck(data, required):
+    '''
+    Fast check that all items of list data are objects holding all required entries,
+    when they are all expected to be floats. Only worth it for objects without optional
+    entries, as these would need a second pass on the items. The values of all these entries
+    are gathered in a single list, which is then checked in one go.
+    Returns False when this could not be established (no fast check available or worth it,
+    some item not an object or missing an entry, some value not a float),
+    in which case items have to be checked one by one
+    '''
+    if len(data) * len(required) < _FAST_MIN_ITEMS:
+        return False
+    try:
+        values = [item[key] for item in data for key, _ in required]
+    except (KeyError, TypeError):
+        return False
+    return _allFloats(values)
+
+_TRACK_ENTRIES_REQ = (
+    ('pos', posAttributeCheck),
+)
+_TRACK_ENTRIES_OPT = (
+    _COLOR_OPT,
+    ('dparams', dparamsAttributeCheck),
+    ('d0', floatCheck),
+    ('z0', floatCheck),
+    ('phi', floatCheck),
+    ('eta', floatCheck),
+)
+_trackCheck = _compile(_TRACK_ENTRIES_REQ, _TRACK_ENTRIES_OPT, 'Track')
+
 def tracksCheck(data_name, data):
     '''Check that the object is a valid Tracks entry'''
-    entries = {
-        'pos' : (False, posAttributeCheck),
-        'color' : (True, colorAttributeCheck),
-        'dparams' : (True, dparamsAttributeCheck),
-        'd0' : (True, floatCheck),
-        'z0' : (True, floatCheck),
-        'phi' : (True, floatCheck),
-        'eta' : (True, floatCheck),
-    }
     genericTypeCheck(data, data_name, list)
-    n = 1
-    for track in data:
+    for n, track in enumerate(data, start=1):
         # check entries of the Track
-        genericCheck(track, entries, '%s, track %d' % (data_name, n), 'Track')
-        n += 1
+        _trackCheck(track, _LazyName(data_name, ', track ', n))
+
+_JET_ENTRIES_REQ = (
+    ('eta', floatCheck),
+    ('phi', floatCheck),
+)
+_JET_ENTRIES_OPT = (
+    ('theta', floatCheck),
+    ('energy', floatCheck),
+    ('et', floatCheck),
+    ('coneR', floatCheck),
+    _COLOR_OPT,
+)
+_jetCheck = _compile(_JET_ENTRIES_REQ, _JET_ENTRIES_OPT, 'Jet')
 
 def jetsCheck(data_name, data):
     '''Check that the object is a valid Jets entry'''
-    entries = {
-        'eta' : (False, floatCheck),
-        'phi' : (False, floatCheck),
-        'theta' : (True, floatCheck),
-        'energy' : (True, floatCheck),
-        'et' : (True, floatCheck),
-        'coneR' : (True, floatCheck),
-        'color' : (True, colorAttributeCheck),
-    }
     genericTypeCheck(data, data_name, list)
-    n = 1
-    for jet in data:
+    for n, jet in enumerate(data, start=1):
         # check entries of the Track
-        genericCheck(jet, entries, '%s, jet %d' % (data_name, n), 'Jet')
-        n += 1
-        
+        _jetCheck(jet, _LazyName(data_name, ', jet ', n))
+
+'''number of coordinates expected in the pos attribute of each type of Hit'''
+_EXP_NPOS = {'Point': 3, 'Box': 6, 'Line': 6}
+
+_HIT_ENTRIES_REQ = (
+    ('pos', floatListCheck),
+)
+_HIT_ENTRIES_OPT = (
+    ('type', hitTypeCheck),
+    _COLOR_OPT,
+)
+_hitCheck = _compile(_HIT_ENTRIES_REQ, _HIT_ENTRIES_OPT, 'Hit')
+
 def hitsCheck(data_name, data):
     '''Check that the object is a valid Hits entry'''
     # data should be a list of "hits"
@@ -147,104 +327,126 @@ def hitsCheck(data_name, data):
     # check whether we have a list of position triplets or a list of objects
     if isinstance(data[0], list):
         # we have a list of positions, each of them should be a riplet of floats
-        n = 0
-        for position in data:
-            pos_name = '%s, position %d' % (data_name, n)
+        # check them all in one go if possible
+        if _allTriplets(data):
+            return
+        for n, position in enumerate(data):
             genericTypeCheck(position, data_name, list)
             if len(position) != 3:
                 raise PhoenixFormatError(
-                    "Expected Hits to be triplets of values. Not the case for %s" % pos_name)
-            floatCheck(position[0], pos_name + ', coordinate x')
-            floatCheck(position[1], pos_name + ', coordinate y')
-            floatCheck(position[2], pos_name + ', coordinate z')
-            n += 1
+                    "Expected Hits to be triplets of values. Not the case for %s",
+                    _LazyName(data_name, ', position ', n))
+            x, y, z = position
+            if not ((type(x) is float or type(x) is int) and (type(y) is float or type(y) is int)
+                    and (type(z) is float or type(z) is int)):
+                # only name the position when one of the coordinates is wrong
+                pos_name = _LazyName(data_name, ', position ', n)
+                floatCheck(x, _LazyName(pos_name, ', coordinate x'))
+                floatCheck(y, _LazyName(pos_name, ', coordinate y'))
+                floatCheck(z, _LazyName(pos_name, ', coordinate z'))
     else:
         # we have a list of "Hit" objects
-        entries =  {
-            'type' : (True, hitTypeCheck),
-            'pos' : (False, floatListCheck),
-            'color' : (True, colorAttributeCheck),
-        }
-        n = 0
-        for hit in data:
+        for n, hit in enumerate(data):
             # check Hit structure
-            genericCheck(hit, entries,'%s, hit %d' % (data_name, n), "Hit")
+            _hitCheck(hit, _LazyName(data_name, ', hit ', n))
             # check type and len of pos match
-            typ = hit['type'] if 'type' in hit else 'Point'
+            typ = hit.get('type', 'Point')
             npos = len(hit['pos'])
-            expNpos = 3 if typ == 'Point' else 6
+            expNpos = _EXP_NPOS[typ]
             if npos != expNpos:
                 raise PhoenixFormatError(
-                    "Expected %d coordinates per Hit in %s. Found %d in hit %d" % (expNpos, data_name, npos, n))
-            n += 1
+                    "Expected %d coordinates per Hit in %s. Found %d in hit %d", expNpos, data_name, npos, n)
+
+_CLUSTER_ENTRIES_REQ = (
+    ('energy', floatCheck),
+    ('phi', floatCheck),
+    ('eta', floatCheck),
+)
+_CLUSTER_ENTRIES_OPT = ()
+_clusterCheck = _compile(_CLUSTER_ENTRIES_REQ, _CLUSTER_ENTRIES_OPT, 'CaloCluster/CaloCell')
 
 def clustersCheck(data_name, data):
     '''Check that the object is a valid CaloClusters/CaloCells entry'''
     # data should be a list of CaloClusters or CaloCells
     genericTypeCheck(data, data_name, list)
-    # check entries' structure
-    entries =  {
-        'energy' : (False, floatCheck),
-        'phi' : (False, floatCheck),
-        'eta' : (False, floatCheck),
-    }
-    n = 0
-    for item in data:
-        genericCheck(item, entries, '%s, entry %d' % (data_name, n), 'CaloCluster/CaloCell')
-        n += 1
+    # check entries' structure, in one go if possible
+    if _bulkFloatEntriesCheck(data, _CLUSTER_ENTRIES_REQ):
+        return
+    for n, item in enumerate(data):
+        _clusterCheck(item, _LazyName(data_name, ', entry ', n))
+
+def _floatListCheck4(j, name):
+    '''Checks that the object is a list of 4 floats'''
+    floatListCheck(j, name, 4)
+
+def _floatListCheck2(j, name):
+    '''Checks that the object is a list of 2 floats'''
+    floatListCheck(j, name, 2)
+
+def _cellsListCheck(j, name):
+    '''Checks that the cells attribute of PlanarCaloCells is a list'''
+    genericTypeCheck(j, _LazyName(name, ", cells attribute"), list)
+
+_PLANARCALO_ENTRIES_REQ = (
+    ('plane', _floatListCheck4),
+    ('cells', _cellsListCheck),
+)
+_PLANARCALO_ENTRIES_OPT = ()
+
+_CELL_ENTRIES_REQ = (
+    ('cellSize', floatCheck),
+    ('energy', floatCheck),
+    ('pos', _floatListCheck2),
+)
+_CELL_ENTRIES_OPT = (
+    _COLOR_OPT,
+)
+_cellCheck = _compile(_CELL_ENTRIES_REQ, _CELL_ENTRIES_OPT, 'CaloCell')
 
 def planarCaloCheck(data_name, data):
     '''Check that the object is a valid PlanarCaloCells entry'''
     # data should be an object
     genericTypeCheck(data, data_name, dict)
     # check entries
-    entries = {
-        'plane' : (False, lambda j, n : floatListCheck(j, n, 4)),
-        'cells' : (False, lambda j, name : genericTypeCheck(j, name + ", cells attribute", list)),
-    }
-    genericCheck(data, entries, data_name, 'PlanarCaloCells')
+    genericCheck(data, _PLANARCALO_ENTRIES_REQ, _PLANARCALO_ENTRIES_OPT, data_name, 'PlanarCaloCells')
     # check each cell
-    cellEntries = {
-        'cellSize' : (False, floatCheck),
-        'energy' : (False, floatCheck),
-        'pos' : (False, lambda j, n : floatListCheck(j, n, 2)),
-        'color' : (True, colorAttributeCheck),
-    }
-    n = 0
-    for cell in data['cells']:
-        genericCheck(cell, cellEntries, data_name + ', cell %d' % n, 'CaloCell')
-        n += 1
+    for n, cell in enumerate(data['cells']):
+        _cellCheck(cell, _LazyName(data_name, ', cell ', n))
+
+_VERTEX_ENTRIES_REQ = (
+    ('x', floatCheck),
+    ('y', floatCheck),
+    ('z', floatCheck),
+)
+_VERTEX_ENTRIES_OPT = (
+    _COLOR_OPT,
+)
+_vertexCheck = _compile(_VERTEX_ENTRIES_REQ, _VERTEX_ENTRIES_OPT, 'Vertex')
 
 def verticesCheck(data_name, data):
     '''Check that the object is a valid Vertices entry'''
     # data should be a list of Vertices
     genericTypeCheck(data, data_name, list)
     # check Vertices' structure
-    entries =  {
-        'x' : (False, floatCheck),
-        'y' : (False, floatCheck),
-        'z' : (False, floatCheck),
-        'color' : (True, colorAttributeCheck),
-    }
-    n = 0
-    for item in data:
-        genericCheck(item, entries, '%s, vertex %d' % (data_name, n), 'Vertex')
-        n += 1
+    for n, item in enumerate(data):
+        _vertexCheck(item, _LazyName(data_name, ', vertex ', n))
+
+_MISSINGE_ENTRIES_REQ = (
+    ('etx', floatCheck),
+    ('ety', floatCheck),
+)
+_MISSINGE_ENTRIES_OPT = (
+    _COLOR_OPT,
+)
+_missingECheck = _compile(_MISSINGE_ENTRIES_REQ, _MISSINGE_ENTRIES_OPT, 'MissingEnergy')
 
 def missingECheck(data_name, data):
     '''Check that the object is a valid MissingEnergy entry'''
     # data should be a list of objects
     genericTypeCheck(data, data_name, list)
     # check entries' structure
-    entries =  {
-        'etx' : (False, floatCheck),
-        'ety' : (False, floatCheck),
-        'color' : (True, colorAttributeCheck),
-    }
-    n = 0
-    for item in data:
-        genericCheck(item, entries, '%s, object %d' % (data_name, n), 'MissingEnergy')
-        n += 1
+    for n, item in enumerate(data):
+        _missingECheck(item, _LazyName(data_name, ', object ', n))
 
 def compoundCheck(data_name, data):
     # no check for the moment. To be fixed
@@ -271,48 +473,168 @@ def eventDataCheck(event_name, data_type, data):
     raises a PhoenixFormatError in case it is not correct, with indication of the problem
     '''
     # the data_type must be one of the authorized objects types
-    if data_type not in KnownDataTypes.keys():
-        raise PhoenixFormatError("Unknown data type found : '%s'" % data_type)
+    checker = KnownDataTypes.get(data_type)
+    if checker is None:
+        raise PhoenixFormatError("Unknown data type found : '%s'", data_type)
     # for each collection of this data type, check the structure
-    for collection_name in data:
-        KnownDataTypes[data_type]("event '%s', collection '%s'" % (event_name, collection_name), data[collection_name])
+    for collection_name, collection in data.items():
+        checker(_LazyName("event '", event_name, "', collection '", collection_name, "'"), collection)
+
+'''events are supposed to be objects with an event number and a run number, which may be missing'''
+_EVENT_ENTRIES_REQ = ()
+_EVENT_ENTRIES_OPT = (
+    ('event number', noCheck),
+    ('run number', noCheck),
+)
+
+'''
+when set, only the top level structure is checked, that is events being objects.
+Meant for trusted inputs, see checksDisabled. Kept in a context variable so that
+disabling the checks in a thread does not affect the checks run by other threads
+'''
+_skipChecks = ContextVar('phoenixSkipChecks', default=os.environ.get('PHOENIX_SKIP_CHECKS') == '1')
+
+@contextmanager
+def checksDisabled():
+    '''
+    context manager disabling the checks of the content of events, e.g. for files
+    which were already validated. Same as setting PHOENIX_SKIP_CHECKS=1 in the environment,
+    but only for the current thread
+    '''
+    token = _skipChecks.set(True)
+    try:
+        yield
+    finally:
+        _skipChecks.reset(token)
 
 def eventCheck(event_name, event):
     '''
     Checks the structure of a Phoenix event object
     raises a PhoenixFormatError in case it is not correct, with indication of the problem
     '''
-    # events are supposed to be objects with an event number and a run number    
-    entries = {
-        'event number' : {False, noCheck},
-        'run number' : {False, noCheck},
-    }
-    genericCheck(event, entries, 'top level event ' + event_name, 'Event')
+    genericCheck(event, _EVENT_ENTRIES_REQ, _EVENT_ENTRIES_OPT, _LazyName('top level event ', event_name), 'Event')
+    # trusted inputs, see checksDisabled
+    if _skipChecks.get():
+        return
     # check event data, ignoring entries not holding a dictionnary
-    for data in event:
-        if isinstance(event[data], dict):
-            eventDataCheck(event_name, data, event[data])
+    for data_type, data in event.items():
+        if isinstance(data, dict):
+            eventDataCheck(event_name, data_type, data)
 
-def check(topJson):
+def topLevelCheck(topJson):
     '''
-    checks whether the given json data respects the phoenix format
-    raises a PhoenixFormatError in case it does not, with indication of the problem
+    Checks the structure of a full phoenix json, event by event
+    raises a PhoenixFormatError in case it is not correct, with indication of the problem
     '''
     # a top level phoenix json is simply a list of events
     if not isinstance(topJson, dict):
         raise PhoenixFormatError("Expected a dictionary at top level")
-    else:
-        # check all events one by one
-        for eventKey in topJson:
-            eventCheck(eventKey, topJson[eventKey])
+    # check all events one by one
+    for event_name, event in topJson.items():
+        eventCheck(event_name, event)
+
+@functools.lru_cache(maxsize=1)
+def buildChecker():
+    '''
+    returns the function checking whether the given json data respects the phoenix format,
+    equivalent to check, so that callers checking many files can retrieve it once and keep it
+    '''
+    return topLevelCheck
+
+def check(topJson):
+    '''
+    checks whether the given json data respects the phoenix format
+    raises a PhoenixFormatError in case it does not, with indication of the problem
+    '''
+    buildChecker()(topJson)
+
+'''content of the file being checked, inherited by forked worker processes, see --jobs'''
+_sharedTopJson = None
+
+def _eventKeyCheck(event_name):
+    '''checks the given event of _sharedTopJson, for dispatching events to forked processes'''
+    eventCheck(event_name, _sharedTopJson[event_name])
 
 # in case we are called as an executable, expect as argument the file to check
 if __name__ == '__main__':
-    if len (sys.argv) != 2:
+    args = sys.argv[1:]
+    syntax = ("Syntax : %s [--stream | --jobs N] <fileName>\n"
+              "  --stream checks events while parsing, using ijson. NaN and Infinity values are not supported then\n"
+              "  --jobs N checks events in parallel with N processes. Not available together with --stream" % sys.argv[0])
+    if '--help' in args or '-h' in args:
+        print (syntax)
+        sys.exit(0)
+    stream = '--stream' in args
+    if stream:
+        args.remove('--stream')
+    jobs = 1
+    if '--jobs' in args:
+        index = args.index('--jobs')
+        value = args[index + 1] if index + 1 < len(args) else ''
+        if not value.isdigit() or int(value) < 1:
+            print ("Invalid value for --jobs : '%s', expected a positive number of processes" % value)
+            print (syntax)
+            sys.exit(1)
+        jobs = int(value)
+        del args[index:index + 2]
+        if stream:
+            print ("--jobs cannot be used together with --stream")
+            print (syntax)
+            sys.exit(1)
+    if len (args) != 1:
         print ("Wrong number of arguments")
-        print ("Syntax : %s <fileName>" % sys.argv[0])
+        print (syntax)
         sys.exit(1)
-    import json
-    json_file = open(sys.argv[1])
-    topJson = json.load(json_file)
-    check(topJson)
+    if stream:
+        # check events one by one while parsing, so that only one is in memory at a time
+        try:
+            import ijson
+        except ImportError:
+            print ("The --stream option requires the ijson module")
+            print (syntax)
+            sys.exit(1)
+        with open(args[0], 'rb') as json_file:
+            # skip a possible UTF-8 BOM, which json accepts too
+            start = 3 if json_file.read(3) == b'\xef\xbb\xbf' else 0
+            json_file.seek(start)
+            # ijson silently yields nothing if the top level is not an object
+            first = json_file.read(1)
+            while first.isspace():
+                first = json_file.read(1)
+            if first != b'{':
+                raise PhoenixFormatError("Expected a dictionary at top level")
+            json_file.seek(start)
+            for eventKey, event in ijson.kvitems(json_file, '', use_float=True):
+                eventCheck(eventKey, event)
+    else:
+        # use orjson for parsing when available, as it is much faster than json
+        try:
+            import orjson
+        except ImportError:
+            orjson = None
+        import json
+        with open(args[0], 'rb') as json_file:
+            content = json_file.read()
+        topJson = None
+        if orjson is not None:
+            try:
+                topJson = orjson.loads(content)
+            except orjson.JSONDecodeError:
+                # orjson rejects NaN, Infinity and very big integers, which json accepts
+                pass
+        if topJson is None:
+            topJson = json.loads(content)
+        import multiprocessing
+        if jobs < 2 or not isinstance(topJson, dict) or len(topJson) < 2 \
+           or 'fork' not in multiprocessing.get_all_start_methods():
+            check(topJson)
+        else:
+            # events are independent, so check them in parallel. Workers are forked so that
+            # they inherit the parsed file and only receive event names, as pickling events
+            # would cost more than checking them. Errors are raised again here, in the order of the events
+            from concurrent.futures import ProcessPoolExecutor
+            _sharedTopJson = topJson
+            eventNames = list(topJson)
+            with ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context('fork')) as executor:
+                for _ in executor.map(_eventKeyCheck, eventNames, chunksize=max(1, len(eventNames) // (4 * jobs))):
+                    pass